@@ -1,5 +1,57 @@
+import math
 import numpy as np
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError: # numba é opcional - sem ele os kernels rodam como funções Python/NumPy comuns
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+try:
+    import cupy
+except ImportError: # CuPy é opcional - necessário apenas para device='cuda'
+    cupy = None
+
+# Módulo de arrays do device: numpy para 'cpu' e cupy para 'cuda'
+# O restante do código é o mesmo nos dois casos, já que o CuPy segue a API do NumPy
+# Experimental: o caminho 'cuda' não é testado (este ambiente não possui GPU nem CuPy)
+def array_module(device):
+    if device == 'cpu':
+        return np
+    if device == 'cuda':
+        if cupy is None:
+            raise ImportError("device='cuda' requer o CuPy instalado")
+        return cupy
+    raise ValueError(f"device deve ser 'cpu' ou 'cuda', não {device!r}")
+
+# Sigmoid de um float - 1 / (1 + exp(-x)), usada por Node.sigmoid e DualNode.sigmoid
+# math.exp em um float é bem mais barato que np.exp, que passa pelo dispatch de arrays do NumPy
+# Para x < 0 usa exp(x) / (1 + exp(x)), evitando overflow de exp(-x)
+def _sigmoid(x):
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    exp = math.exp(x)
+    return exp / (1.0 + exp)
+
+# Códigos das operações que produzem cada nó
+# O backward de um nó é resolvido por _apply_backward a partir do código, sem uma closure por nó
+OP_LEAF    = -1 # nó folha (valor de entrada ou parâmetro)
+OP_ADD     = 0
+OP_MUL     = 1
+OP_POW     = 2
+OP_RELU    = 3
+OP_SIGMOID = 4
+OP_DIV     = 5
+OP_CUSTOM  = 6  # operação com derivada própria (closure em _backward), como Node.linear e TensorNode
+OP_ADD_CONST = 7 # a + c, com c uma constante numérica guardada em _const (sem Node para c)
+OP_MUL_CONST = 8 # a * c
+OP_RDIV_CONST = 9 # c / a
+
 '''
     Classe Node:
     - Armazena informação sobre um nó dentro do grafo computacional
@@ -10,65 +62,71 @@ import numpy as np
     - Além disso, cada nó possui um identificador de operação que foi feito para resultar nele
 '''
 class Node:
-    
-    def __init__(self, scalar, _children_components=(), _math_operator=''):
+
+    # Sem __dict__ por instância: menos memória e acesso a atributos mais rápido
+    __slots__ = ('scalar', '_math_operator', 'gradient', '_op', '_const', '_backward', '_lhs', '_rhs', '_children')
+
+    def __init__(self, scalar, _lhs=None, _rhs=None, _math_operator='', _op=OP_LEAF, _const=None, _children=()):
 
         self.scalar = scalar                 # Valor escalar
         self._math_operator = _math_operator # operação matemática fica para produzir o nó atual
-        
-        self.gradient = 0                    # Gradiente que é utilizado no backprop  
-        self._backward = lambda: None        # Define a derivada para ser computada no backpropagation
-        
-        self._previous = set(_children_components) # armazena os nós subsequentes
+
+        self.gradient = 0                    # Gradiente que é utilizado no backprop
+        self._op = _op                       # Código da operação, define a derivada computada no backpropagation
+        self._const = _const                 # Constante da operação (o expoente de '**' ou o c de a + c, a * c)
+        self._backward = None                # Derivada própria, apenas para operações OP_CUSTOM
+
+        self._lhs = _lhs                           # filhos de operações unárias (apenas _lhs) e binárias
+        self._rhs = _rhs
+        self._children = _children                 # filhos de operações de aridade variável (OP_CUSTOM)
 
     # Realiza a operação de adição 'a + b'
+    # As derivadas de cada operação estão em _apply_backward
+    # Quando b é uma constante numérica não é criado um Node para ela, b fica guardado em _const
     def __add__(self, b):
-        b = b if isinstance(b, Node) else Node(b)
-        res = Node(self.scalar + b.scalar, (self, b), '+')
-
-        # Define a operação de backward propagation este nó
-        # r = a + b
-        # dr/da e dr/db = 1
-        # utilizando a regra da cadeia para L: dL / da = dL/dr x dr/da, assim dL/da = dr/da
-        # considerando r como o output dessa operação, teremos gradient = dr/da
-        def _backward():   
-            self.gradient += res.gradient
-            b.gradient    += res.gradient
-        
-        res._backward = _backward
+        if not isinstance(b, Node):
+            return Node(self.scalar + b, self, None, '+c', OP_ADD_CONST, b)
+        return Node(self.scalar + b.scalar, self, b, '+', OP_ADD)
 
-        return res
-    
     # Realiza a operação de multiplicação
     def __mul__(self, b):
-        b = b if isinstance(b, Node) else Node(b)
-        res = Node(self.scalar * b.scalar, (self, b), '*')
-
-        # Define a operação de backward propagation para este nó
-        # r = a * b
-        # dr/da = b e dr/db = a (cruzada)
-        # Utilizando a regra da cadeia para L: dL/da = dL/dr x dr/da, assim dL/da = dL/dr x b
-        # Portanto, multiplicamos o upstream gradiente (gradiente propagado pela camada mais acima)
-        # pelo gradiente atual resultante da multiplicação (derivadas cruzadas)
-        def _backward():
-            self.gradient += b.scalar * res.gradient
-            b.gradient    += self.scalar * res.gradient
-        
-        res._backward = _backward
+        if not isinstance(b, Node):
+            return Node(self.scalar * b, self, None, '*c', OP_MUL_CONST, b)
+        return Node(self.scalar * b.scalar, self, b, '*', OP_MUL)
 
-        return res
-    
-    # Realiza a exponenciação 
+    # Realiza a exponenciação
     # r = a**b - considerando b como um valor inteiro ou float
-    # dr/da = ba^{b-1}
-    # Da mesma forma, teremos que realizar a regra da cadeia, multiplicando pelo upstream gradient
-    def _pow__(self, b):
+    def __pow__(self, b):
         assert isinstance(b, (int, float)), "Apenas exponenciação de valores inteiros ou flutuantes"
-        res = Node(self.scalar ** b, (self, ), f'**{b}')
+        return Node(self.scalar ** b, self, None, f'**{b}', OP_POW, b)
+
+    # Realiza a divisão diretamente, em um único nó
+    def __truediv__(self, b):
+        if not isinstance(b, Node): # a / c tem a mesma derivada que a * (1/c)
+            return Node(self.scalar / b, self, None, '/c', OP_MUL_CONST, 1.0 / b)
+        return Node(self.scalar / b.scalar, self, b, '/', OP_DIV)
+
+    # Combinação linear fundida em um único nó: r = sum(wi * xi) + b
+    # Substitui os ~2N nós intermediários de somas e multiplicações por um só
+    # dr/dwi = xi, dr/dxi = wi e dr/db = 1
+    # Entradas xi numéricas (constantes) não viram Nodes: apenas os pesos recebem o gradiente delas
+    @classmethod
+    def linear(cls, w, x, b):
+        x_nodes = [(wi, xi) for wi, xi in zip(w, x) if isinstance(xi, Node)]
+        x_const = [(wi, xi) for wi, xi in zip(w, x) if not isinstance(xi, Node)]
+
+        scalar = sum(wi.scalar * xi.scalar for wi, xi in x_nodes) + sum(wi.scalar * xi for wi, xi in x_const) + b.scalar
+        res = cls(scalar, _math_operator='Linear', _op=OP_CUSTOM, _children=(*w, *(xi for _, xi in x_nodes), b))
 
         def _backward():
-            self.gradient += (b * self.scalar ** (b - 1)) * res.gradient
-        
+            gradient = res.gradient
+            for wi, xi in x_nodes:
+                wi.gradient += xi.scalar * gradient
+                xi.gradient += wi.scalar * gradient
+            for wi, xi in x_const:
+                wi.gradient += xi * gradient
+            b.gradient += gradient
+
         res._backward = _backward
 
         return res
@@ -89,11 +147,8 @@ class Node:
     def __rsub__(self, b): # subtração b - a
         return b + (-self)
     
-    def __truediv__(self, b): # divisão a / b
-        return self * b **( -1)
-    
-    def __rtruediv__(self, b): # divisão b / a
-        return b * self **( -1)
+    def __rtruediv__(self, b): # divisão c / a, com c constante
+        return Node(b / self.scalar, self, None, 'c/', OP_RDIV_CONST, b)
     
     def __gt__(self, other):
         return self.scalar > other.scalar
@@ -115,51 +170,402 @@ class Node:
 
     # Função de ativação ReLU - max(0, x)
     def relu(self):
-        res = Node(0 if self.scalar < 0 else self.scalar, (self, ), 'ReLU')
+        return Node(0 if self.scalar < 0 else self.scalar, self, None, 'ReLU', OP_RELU)
+
+    # Função de ativação sigmoid - 1 / (1 + exp(-x)), ver _sigmoid
+    def sigmoid(self):
+        return Node(_sigmoid(self.scalar), self, None, 'Sigmoid', OP_SIGMOID)
+
+    # Função de softmax - Recebe uma lista de nós e devolve a lista de nós com os scores
+    # O cálculo é vetorizado em um único TensorNode (ver TensorNode.softmax)
+    @staticmethod
+    def softmax(x):
+        return TensorNode.from_nodes(x).softmax().to_nodes()
+
+
+    # Baseando-se em um nó podemos realizar o backpropagation dele para os outros elementos
+    # Para isso, iremos seguir a ordem contrária com que o grafo computacional é construído
+    # A ordenação não fica guardada no nó: ela contém a própria raiz e criaria um ciclo de referências
+    # que mantém o grafo inteiro vivo. Para repetir o backward do mesmo grafo, use compile_backward
+    def backward_propagation(self):
+        self.gradient = 1 # Gradiente incia-se como 1 (dL/dL = 1)
+        for node in reversed(build_topological_sort(self)):
+            _apply_backward(node) # Calcula o gradiente para cada nó de maneira reversa
+
+    # Pré-compila o backpropagation deste grafo: retorna uma função que zera os gradientes de
+    # todos os nós e aplica as derivadas na ordem reversa, sem refazer a ordenação a cada chamada
+    # Com o numba disponível e um grafo só de operações escalares, o backward é a fita compilada
+    # Nos dois casos as derivadas usam o valor atual de node.scalar a cada chamada (nada é copiado aqui)
+    # A ordenação fica apenas na closure retornada, sendo liberada junto com ela
+    def compile_backward(self):
+        order = build_topological_sort(self)
+        tape = compile_tape(order) if HAS_NUMBA else None
+        if tape is not None:
+
+            def run_tape_backward():
+                values = np.fromiter((node.scalar for node in order), dtype=np.float64, count=len(order))
+                gradients = np.zeros(len(order))
+                gradients[-1] = 1
+                replay_backward(*tape, values, gradients)
+                for node, gradient in zip(order, gradients.tolist()):
+                    node.gradient = gradient
+
+            return run_tape_backward
+
+        reversed_order = order[::-1]
+        scalar_nodes = [node for node in reversed_order if isinstance(node, Node)]
+        tensor_nodes = [node for node in reversed_order if isinstance(node, TensorNode)]
+
+        def run_backward():
+            for node in scalar_nodes:
+                node.gradient = 0
+            for node in tensor_nodes:
+                node.grad.fill(0)
+
+            self.gradient = 1
+            for node in reversed_order:
+                _apply_backward(node)
+
+        return run_backward
+
+
+'''
+    Classe TensorNode:
+    - Nó do grafo computacional que armazena um np.ndarray ao invés de um escalar
+    - Permite registrar uma única entrada no grafo para uma operação vetorizada inteira
+      (por exemplo W @ x + b de uma camada), ao invés de um Node por multiplicação/soma escalar
+    - Compartilha o mesmo protocolo de Node (_lhs/_rhs/_children e _backward), de forma que grafos
+      mistos (escalares e tensores) são percorridos pelo mesmo backpropagation
+'''
+class TensorNode:
+
+    _op = OP_CUSTOM # todo TensorNode define a sua própria derivada em _backward
+
+    def __init__(self, value, _lhs=None, _rhs=None, _math_operator='', _children=()):
+
+        xp = cupy if cupy is not None and isinstance(value, cupy.ndarray) else np
+        self.value = xp.asarray(value, dtype=xp.float64) # Valor do tensor (ndarray do NumPy ou do CuPy)
+        self._math_operator = _math_operator             # operação matemática que produziu o nó atual
+
+        self.grad = xp.zeros_like(self.value)            # Gradiente (mesmo formato do valor)
+        self._backward = lambda: None
+
+        self._lhs = _lhs
+        self._rhs = _rhs
+        self._children = _children
+
+    # Constrói um TensorNode a partir de uma lista de Nodes escalares (ou números)
+    # O gradiente do tensor é espalhado de volta para cada Node no backpropagation
+    @classmethod
+    def from_nodes(cls, nodes):
+        nodes = list(nodes)
+        res = cls([n.scalar if isinstance(n, Node) else n for n in nodes],
+                  _math_operator='stack', _children=tuple(n for n in nodes if isinstance(n, Node)))
+
+        def _backward():
+            for n, g in zip(nodes, res.grad.tolist()):
+                if isinstance(n, Node):
+                    n.gradient += g
+
+        res._backward = _backward
+
+        return res
+
+    # Device em que o tensor está: 'cuda' para arrays do CuPy e 'cpu' para arrays do NumPy
+    @property
+    def device(self):
+        return 'cuda' if cupy is not None and isinstance(self.value, cupy.ndarray) else 'cpu'
+
+    # Copia o tensor para o device ('cpu' ou 'cuda'), devolvendo o gradiente para o device de origem
+    def to_device(self, device):
+        if device == self.device:
+            return self
+
+        array_module(device) # garante que o CuPy está disponível
+        transfer = cupy.asarray if device == 'cuda' else cupy.asnumpy
+        back = cupy.asnumpy if device == 'cuda' else cupy.asarray
+        res = TensorNode(transfer(self.value), self, None, f'to({device})')
+
+        def _backward():
+            self.grad += back(res.grad)
+
+        res._backward = _backward
+
+        return res
+
+    # Separa o tensor em Nodes escalares, um por elemento (lista de linhas para tensores 2D)
+    # Cada Node devolve o seu gradiente para a posição correspondente do tensor
+    def to_nodes(self):
+        nodes = []
+        for i in np.ndindex(*self.value.shape):
+            node = Node(float(self.value[i]), self, None, 'index', OP_CUSTOM)
+
+            def _backward(i=i, node=node):
+                self.grad[i] += node.gradient
+
+            node._backward = _backward
+            nodes.append(node)
+
+        if self.value.ndim == 2:
+            n_columns = self.value.shape[1]
+            return [nodes[i:i + n_columns] for i in range(0, len(nodes), n_columns)]
+
+        return nodes
+
+    # Multiplicação elemento a elemento
+    # Assim como em Node, uma constante (número ou ndarray) não vira um TensorNode
+    def __mul__(self, b):
+        if not isinstance(b, TensorNode):
+            res = TensorNode(self.value * b, self, None, '*c')
+
+            def _backward():
+                self.grad += b * res.grad
+
+            res._backward = _backward
+
+            return res
+
+        res = TensorNode(self.value * b.value, self, b, '*')
+
+        def _backward():
+            self.grad += b.value * res.grad
+            b.grad    += self.value * res.grad
+
+        res._backward = _backward
+
+        return res
+
+    def __rmul__(self, b):
+        return self * b
+
+    # Soma de todos os elementos, resultando em um Node escalar
+    def sum(self):
+        res = Node(float(self.value.sum()), self, None, 'sum', OP_CUSTOM)
+
+        def _backward():
+            self.grad += res.gradient
+
+        res._backward = _backward
+
+        return res
+
+    def __repr__(self):
+        return f"TensorNode(value={self.value}, grad={self.grad})"
+
+    # Função de ativação ReLU aplicada a todos os elementos - max(0, x)
+    def relu(self):
+        res = TensorNode(np.maximum(0, self.value), self, None, 'ReLU')
 
         def _backward():
-            self.gradient += (res.scalar > 0) * res.gradient
-        
+            self.grad += (res.value > 0) * res.grad
+
         res._backward = _backward
 
         return res
 
+    # Função sigmoid aplicada a todos os elementos - y = 1 / (1 + exp(-x))
+    # dL/dx = dL/dy * y * (1 - y)
     def sigmoid(self):
-        res = Node(1/(1 + np.exp(-self.scalar)), (self,), 'Sigmoid')
+        res = TensorNode(1 / (1 + np.exp(-self.value)), self, None, 'Sigmoid')
 
         def _backward():
-            self.gradient += res.scalar * (1 - res.scalar)
-        
+            self.grad += res.grad * res.value * (1 - res.value)
+
         res._backward = _backward
-        
+
         return res
 
-    # Função de softmax - Recebe um valor e uma lista de outros nós
-    def softmax(self, x):
-        sum_softmax = 0
-        for xi in x:
-            sum_softmax = np.exp(xi.scalar)
+    # Função de softmax numericamente estável - y = exp(x - max(x)) / sum(exp(x - max(x)))
+    # Produto vetor-jacobiano: dL/dx = y * (dL/dy - sum(y * dL/dy))
+    def softmax(self):
+        exp = np.exp(self.value - self.value.max())
+        res = TensorNode(exp / exp.sum(), self, None, 'Softmax')
 
-        softmax_score = np.exp(self.scalar) / sum_softmax
+        def _backward():
+            self.grad += res.value * (res.grad - (res.value * res.grad).sum())
 
-        return softmax_score
+        res._backward = _backward
 
+        return res
 
-    # Baseando-se em um nó podemos realizar o backpropagation dele para os outros elementos
-    # Para isso, iremos seguir a ordem contrária com que o grafo computacional é construído
+    # Backpropagation a partir de um tensor: o gradiente inicial é 1 para todos os elementos
     def backward_propagation(self):
-        topological_sorted = []
-        visited = set()
-        
-        def build_topological_sort(i):
-            if i not in visited:
-                visited.add(i)
-                for child in i._previous:
-                    build_topological_sort(child)
-                topological_sorted.append(i)
-        
-        build_topological_sort(self)
+        self.grad = np.ones_like(self.value)
+        for node in reversed(build_topological_sort(self)):
+            _apply_backward(node)
 
-        self.gradient = 1 # Gradiente incia-se como 1 (dL/dL = 1)
-        for node in reversed(topological_sorted):
-            node._backward() # Calcula o gradiente para cada nó de maneira reversa
+
+# Ordenação topológica do grafo computacional a partir do nó raiz
+# Funciona tanto para Node quanto para TensorNode
+# DFS iterativa com uma pilha explícita: evita o limite de recursão do Python em grafos profundos
+# Cada nó entra na pilha como (nó, False) para visitar os filhos e volta como (nó, True) para ser
+# adicionado à ordenação depois deles. Os filhos são lidos direto de _lhs/_rhs, sem montar uma tupla;
+# _children só é percorrido pelas operações de aridade variável
+def build_topological_sort(root):
+    topological_sorted = []
+    visited = set() # ids (inteiros) são mais baratos de hashear que os próprios nós
+
+    append = topological_sorted.append
+    visit = visited.add
+
+    stack = [(root, False)]
+    push = stack.append
+    pop = stack.pop
+    while stack:
+        node, expanded = pop()
+        if expanded:
+            append(node)
+            continue
+        if id(node) in visited:
+            continue
+
+        visit(id(node))
+        push((node, True))
+
+        child = node._rhs
+        if child is not None and id(child) not in visited:
+            push((child, False))
+        child = node._lhs
+        if child is not None and id(child) not in visited:
+            push((child, False))
+        for child in node._children:
+            if id(child) not in visited:
+                push((child, False))
+
+    return topological_sorted
+
+
+# Derivada de cada operação, aplicada ao nó 'node' durante o backpropagation
+# Assim como na regra da cadeia, o gradiente local é multiplicado pelo upstream gradient (node.gradient)
+def _apply_backward(node):
+    op = node._op
+
+    # r = a + b
+    # dr/da e dr/db = 1
+    # utilizando a regra da cadeia para L: dL / da = dL/dr x dr/da, assim dL/da = dr/da
+    # considerando r como o output dessa operação, teremos gradient = dr/da
+    if op == OP_ADD:
+        a, b = node._lhs, node._rhs
+        a.gradient += node.gradient
+        b.gradient += node.gradient
+
+    # r = a * b
+    # dr/da = b e dr/db = a (cruzada)
+    # Utilizando a regra da cadeia para L: dL/da = dL/dr x dr/da, assim dL/da = dL/dr x b
+    # Portanto, multiplicamos o upstream gradiente (gradiente propagado pela camada mais acima)
+    # pelo gradiente atual resultante da multiplicação (derivadas cruzadas)
+    elif op == OP_MUL:
+        a, b = node._lhs, node._rhs
+        a.gradient += b.scalar * node.gradient
+        b.gradient += a.scalar * node.gradient
+
+    # r = a**c - considerando c como um valor inteiro ou float
+    # dr/da = ca^{c-1}
+    elif op == OP_POW:
+        a = node._lhs
+        c = node._const
+        a.gradient += (c * a.scalar ** (c - 1)) * node.gradient
+
+    elif op == OP_RELU:
+        a = node._lhs
+        a.gradient += (node.scalar > 0) * node.gradient
+
+    # r = sigmoid(a)
+    # dr/da = r(1 - r)
+    elif op == OP_SIGMOID:
+        a = node._lhs
+        a.gradient += node.scalar * (1 - node.scalar) * node.gradient
+
+    # r = a / b
+    # dr/da = 1/b e dr/db = -a/b^2
+    elif op == OP_DIV:
+        a, b = node._lhs, node._rhs
+        inverse = 1.0 / b.scalar
+        a.gradient += inverse * node.gradient
+        b.gradient += -a.scalar * inverse * inverse * node.gradient
+
+    # r = a + c e r = a * c, com c constante
+    # dr/da = 1 e dr/da = c
+    elif op == OP_ADD_CONST:
+        a = node._lhs
+        a.gradient += node.gradient
+
+    elif op == OP_MUL_CONST:
+        a = node._lhs
+        a.gradient += node._const * node.gradient
+
+    # r = c / a, com c constante
+    # dr/da = -c/a^2
+    elif op == OP_RDIV_CONST:
+        a = node._lhs
+        a.gradient += -node._const / (a.scalar * a.scalar) * node.gradient
+
+    elif op == OP_CUSTOM:
+        node._backward()
+
+
+'''
+    Fita compilada do backpropagation
+    - Cada nó escalar da ordenação topológica vira uma posição dos arrays paralelos
+      ops (código da operação), lhs/rhs (índices dos filhos) e aux (constante da operação, ver Node._const)
+    - O backward é então um único laço sobre esses arrays (replay_backward), compilado pelo numba,
+      ao invés de uma chamada de _apply_backward por nó
+'''
+# Converte a ordenação topológica em (ops, lhs, rhs, aux) - apenas a estrutura do grafo
+# Os valores dos nós não entram na fita: são lidos a cada replay (ver Node.compile_backward)
+# Retorna None se algum nó não puder ser representado na fita (OP_CUSTOM: TensorNode, Node.linear, ...)
+def compile_tape(topological_sorted):
+    if any(node._op == OP_CUSTOM for node in topological_sorted):
+        return None
+
+    n = len(topological_sorted)
+    index = {id(node): i for i, node in enumerate(topological_sorted)}
+
+    ops = np.empty(n, dtype=np.int8)
+    lhs = np.full(n, -1, dtype=np.int32)
+    rhs = np.full(n, -1, dtype=np.int32)
+    aux = np.zeros(n)
+
+    for i, node in enumerate(topological_sorted):
+        ops[i] = node._op
+        if node._const is not None:
+            aux[i] = node._const
+
+        if node._lhs is not None:
+            lhs[i] = index[id(node._lhs)]
+        if node._rhs is not None:
+            rhs[i] = index[id(node._rhs)]
+
+    return ops, lhs, rhs, aux
+
+# Percorre a fita na ordem reversa acumulando os gradientes (mesmas derivadas de _apply_backward)
+@njit(cache=True)
+def replay_backward(ops, lhs, rhs, aux, values, gradients):
+    for i in range(len(ops) - 1, -1, -1):
+        op = ops[i]
+        gradient = gradients[i]
+        a = lhs[i]
+        b = rhs[i]
+
+        if op == OP_ADD:
+            gradients[a] += gradient
+            gradients[b] += gradient
+        elif op == OP_MUL:
+            gradients[a] += values[b] * gradient
+            gradients[b] += values[a] * gradient
+        elif op == OP_POW:
+            gradients[a] += aux[i] * values[a] ** (aux[i] - 1) * gradient
+        elif op == OP_RELU:
+            if values[i] > 0:
+                gradients[a] += gradient
+        elif op == OP_SIGMOID:
+            gradients[a] += values[i] * (1 - values[i]) * gradient
+        elif op == OP_DIV:
+            gradients[a] += gradient / values[b]
+            gradients[b] += -values[a] / (values[b] * values[b]) * gradient
+        elif op == OP_ADD_CONST:
+            gradients[a] += gradient
+        elif op == OP_MUL_CONST:
+            gradients[a] += aux[i] * gradient
+        elif op == OP_RDIV_CONST:
+            gradients[a] += -aux[i] / (values[a] * values[a]) * gradient
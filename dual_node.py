@@ -0,0 +1,112 @@
+import numpy as np
+from comp_graph_node import _sigmoid
+
+'''
+    Classe DualNode:
+    - Diferenciação automática no modo forward (números duais)
+    - Cada nó carrega o valor escalar e a sua derivada direcional (tangente) ao mesmo tempo
+    - Não existe grafo nem backpropagation: a derivada é propagada junto com o próprio cálculo,
+      então não há ordenação topológica nem closures armazenadas
+    - A tangente pode ser um escalar ou um np.ndarray de tamanho k, propagando k direções de uma vez
+
+    - Vale a pena quando a função possui poucas entradas (n_inputs << n_outputs);
+      para funções R^n -> R com muitas entradas o modo reverso (Node) continua sendo o indicado
+'''
+class DualNode:
+
+    __slots__ = ('scalar', 'tangent')
+
+    def __init__(self, scalar, tangent=0.0):
+        self.scalar = scalar   # Valor escalar
+        self.tangent = tangent # Derivada direcional do valor
+
+    # r = a + b
+    # r' = a' + b'
+    def __add__(self, b):
+        if not isinstance(b, DualNode):
+            return DualNode(self.scalar + b, self.tangent)
+        return DualNode(self.scalar + b.scalar, self.tangent + b.tangent)
+
+    # r = a * b
+    # r' = a'b + ab'
+    def __mul__(self, b):
+        if not isinstance(b, DualNode):
+            return DualNode(self.scalar * b, self.tangent * b)
+        return DualNode(self.scalar * b.scalar, self.tangent * b.scalar + self.scalar * b.tangent)
+
+    # r = a**b - considerando b como um valor inteiro ou float
+    # r' = ba^{b-1} a'
+    def __pow__(self, b):
+        assert isinstance(b, (int, float)), "Apenas exponenciação de valores inteiros ou flutuantes"
+        return DualNode(self.scalar ** b, b * self.scalar ** (b - 1) * self.tangent)
+
+    # r = a / b
+    # r' = a'/b - ab'/b^2
+    def __truediv__(self, b):
+        if not isinstance(b, DualNode):
+            return DualNode(self.scalar / b, self.tangent / b)
+        inverse = 1.0 / b.scalar
+        return DualNode(self.scalar * inverse, (self.tangent - self.scalar * inverse * b.tangent) * inverse)
+
+    ### Operações derivadas da soma e multiplicação
+    def __neg__(self): # Negação
+        return self * (-1)
+
+    def __radd__(self, b): # Alternativa para soma b + a
+        return self + b
+
+    def __rmul__(self, b): # Alternativa para a multiplicação b * a
+        return self * b
+
+    def __sub__(self, b): # subtração a - b
+        return self + (- b)
+
+    def __rsub__(self, b): # subtração b - a
+        return b + (-self)
+
+    def __rtruediv__(self, b): # divisão b / a
+        return DualNode(b) / self
+
+    def __gt__(self, other):
+        return self.scalar > other.scalar
+
+    def __lt__(self, other):
+        return self.scalar < other.scalar
+
+    def __ge__(self, other):
+        return self.scalar >= other.scalar
+
+    def __le__(self, other):
+        return self.scalar <= other.scalar
+
+    ### Representação da estrutura/objeto DualNode
+    def __repr__(self):
+        return f"DualNode(scalar={self.scalar}, tangent={self.tangent})"
+
+    ### Operador/Função de ativação
+
+    # Função de ativação ReLU - max(0, x)
+    def relu(self):
+        if self.scalar < 0:
+            return DualNode(0, self.tangent * 0)
+        return DualNode(self.scalar, self.tangent)
+
+    # r = sigmoid(a)
+    # r' = r(1 - r) a'
+    def sigmoid(self):
+        res = _sigmoid(self.scalar)
+        return DualNode(res, res * (1 - res) * self.tangent)
+
+
+# Produto jacobiano-vetor: avalia f em x propagando a direção v
+# Os DualNodes retornados por f trazem f(x) em scalar e J(x) @ v em tangent
+def jvp(f, x, v):
+    return f([DualNode(xi, vi) for xi, vi in zip(x, v)])
+
+# Gradiente de f: R^n -> R no modo forward
+# Cada entrada carrega uma linha da identidade como tangente, então todas as n derivadas
+# parciais saem de uma única avaliação de f
+def grad_forward(f, x):
+    identity = np.eye(len(x))
+    res = f([DualNode(xi, ei) for xi, ei in zip(x, identity)])
+    return res.tangent.tolist()
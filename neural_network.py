@@ -1,5 +1,41 @@
 import random
-from comp_graph_node import Node
+import numpy as np
+from comp_graph_node import Node, TensorNode, array_module, njit
+
+
+'''
+    Kernels de uma camada densa
+    - Recebem apenas arrays, de forma que o numba consegue compilá-los para código nativo
+    - layer_forward: z = W @ x + b e a ativação (ReLU ou identidade)
+    - layer_backward: a partir do upstream gradient dy, devolve (dx, dW, db)
+    - Versões _batch: o mesmo para um mini-batch X (batch, n_inputs), com um único GEMM por camada
+      O paralelismo vem dos produtos matriciais, que já usam todos os cores via BLAS (OpenBLAS/MKL);
+      o número de threads é controlado por OMP_NUM_THREADS (ou OPENBLAS_NUM_THREADS/MKL_NUM_THREADS)
+'''
+@njit(cache=True, fastmath=True)
+def layer_forward(W, x, b, non_linear):
+    z = W @ x + b
+    return z, np.maximum(0.0, z) if non_linear else z
+
+@njit(cache=True, fastmath=True)
+def layer_backward(W, x, z, dy, non_linear):
+    dz = dy * (z > 0.0) if non_linear else dy
+    return dz @ W, np.outer(dz, x), dz
+
+@njit(cache=True, fastmath=True)
+def layer_forward_batch(W, X, b, non_linear):
+    Z = X @ W.T + b
+    return Z, np.maximum(0.0, Z) if non_linear else Z
+
+@njit(cache=True, fastmath=True)
+def layer_backward_batch(W, X, Z, dY, non_linear):
+    dZ = dY * (Z > 0.0) if non_linear else dY
+    return dZ @ W, dZ.T @ X, dZ.sum(axis=0)
+
+# Versão Python de um kernel (sem a compilação do numba), usada com arrays do CuPy
+# As funções NumPy dos kernels são despachadas para o CuPy pelo protocolo __array_function__
+def _python_kernel(kernel):
+    return getattr(kernel, 'py_func', kernel)
 
 '''
     Classe Module
@@ -29,7 +65,7 @@ class Neuron(Module):
     # Chamada Neuron(valor)
     # Realiza função de ativação em cima da somatória ponderada dos inputs pelos pesos
     def __call__(self, x):
-        activation = sum((wi*xi for wi,xi in zip(self.w, x)), self.b)
+        activation = Node.linear(self.w, x, self.b)
         return activation.relu() if self.non_linear else activation # aplica a função de ativação
     
     def parameters(self):
@@ -41,21 +77,149 @@ class Neuron(Module):
 
 '''
     Classe Layer
-    - Classe que concentra um stacking de neurônios
+    - Concentra um stacking de neurônios de forma vetorizada
+    - Os pesos de todos os neurônios ficam em uma única matriz W (n_output, n_inputs) e os vieses em b (n_output,)
+    - O forward é um único produto matricial z = W @ x + b, registrado como uma única entrada no grafo
 '''
 class Layer(Module):
-    def __init__(self, n_inputs, n_output, **kwargs):
-        self.neurons = [Neuron(n_inputs, **kwargs) for _ in range(n_output)]
+    # device='cuda' mantém W e b na GPU (CuPy); o forward e o backward são os mesmos
+    # Experimental: o caminho 'cuda' não é testado (ver array_module)
+    def __init__(self, n_inputs, n_output, non_linear=True, device='cpu'):
+        self.device = device
+        self._xp = array_module(device)
 
+        self.W = TensorNode(self._xp.asarray(np.random.uniform(-1, 1, (n_output, n_inputs)))) # learnable parameters da camada
+        self.b = TensorNode(self._xp.zeros(n_output)) # vieses b
+        self.non_linear = non_linear
+        self._inference_weights = None # cópia (W, b, escala) em precisão reduzida, usada apenas por predict
+
+        kernels = (layer_forward, layer_backward, layer_forward_batch, layer_backward_batch)
+        self._kernels = kernels if device == 'cpu' else tuple(_python_kernel(kernel) for kernel in kernels)
+
+    # Chamada Layer(x) - x pode ser um TensorNode ou uma lista de Nodes/valores
+    # Linear + ativação são registrados como uma única entrada no grafo
     def __call__(self, x):
-        res = [neuron(x) for neuron in self.neurons]
-        return res[0] if len(res) == 1 else res 
-    
+        x = x if isinstance(x, TensorNode) else TensorNode.from_nodes(x)
+        x = x.to_device(self.device)
+        forward, backward = self._kernels[:2]
+        z, a = forward(self.W.value, x.value, self.b.value, self.non_linear)
+        res = TensorNode(a, _math_operator='ReLU(Linear)' if self.non_linear else 'Linear', _children=(self.W, self.b, x))
+
+        # r = f(W @ x + b), com f = ReLU ou identidade
+        # dL/dz = dL/dr * f'(z), dL/dW = dL/dz (x) x (produto externo), dL/db = dL/dz e dL/dx = W^T @ dL/dz
+        def _backward():
+            dx, dW, db = backward(self.W.value, x.value, z, res.grad, self.non_linear)
+            self.W.grad += dW
+            self.b.grad += db
+            x.grad      += dx
+
+        res._backward = _backward
+
+        return res
+
+    # Forward de um mini-batch X (batch, n_inputs) - ndarray ou TensorNode
+    # Z = X @ W^T + b para todas as amostras de uma vez, também como uma única entrada no grafo
+    def forward_batch(self, X):
+        X = X if isinstance(X, TensorNode) else TensorNode(X)
+        X = X.to_device(self.device)
+        forward, backward = self._kernels[2:]
+        Z, A = forward(self.W.value, X.value, self.b.value, self.non_linear)
+        res = TensorNode(A, _math_operator='ReLU(Linear)' if self.non_linear else 'Linear', _children=(self.W, self.b, X))
+
+        # dL/dW = dL/dZ^T @ X, dL/db = soma de dL/dZ nas amostras e dL/dX = dL/dZ @ W
+        def _backward():
+            dX, dW, db = backward(self.W.value, X.value, Z, res.grad, self.non_linear)
+            self.W.grad += dW
+            self.b.grad += db
+            X.grad      += dX
+
+        res._backward = _backward
+
+        return res
+
+    # Converte os pesos usados na inferência (predict) para dtype - float32 ou int8
+    # Os pesos de treino (W e b em float64) não são alterados; np.float64 volta a usá-los na inferência
+    # int8: W_q = round(W / escala), com escala = max(|W|) / 127 (quantização pós-treino simétrica)
+    # Apenas W_q é guardado (1 byte por peso) e a escala é aplicada à saída do produto em predict;
+    # o NumPy converte W_q para float32 dentro do produto, então o int8 reduz o armazenamento, não o tempo
+    # A cópia é um retrato dos pesos no momento da chamada: após novos passos de treino, chame to() de novo
+    def to(self, dtype):
+        if isinstance(dtype, str) and dtype in ('cpu', 'cuda'):
+            raise ValueError("to() converte apenas o dtype de inferência; o device é escolhido na construção (device=...)")
+
+        dtype = np.dtype(dtype)
+        if dtype == np.float64:
+            self._inference_weights = None
+        elif dtype == np.int8:
+            scale = max(float(np.abs(self.W.value).max()) / 127, np.finfo(np.float32).tiny)
+            W_q = np.round(self.W.value / scale).astype(np.int8)
+            self._inference_weights = (W_q, self.b.value.astype(np.float32), np.float32(scale))
+        else:
+            self._inference_weights = (self.W.value.astype(dtype), self.b.value.astype(dtype), None)
+
+        return self
+
+    # Forward apenas de inferência (sem grafo) para x (n_inputs,) ou X (batch, n_inputs) em ndarray
+    # O resultado fica no device da camada
+    def predict(self, x):
+        W, b, scale = (self.W.value, self.b.value, None) if self._inference_weights is None else self._inference_weights
+        x = self._xp.asarray(x, dtype=b.dtype)
+
+        # int8: x @ (W_q * escala)^T = (x @ W_q^T) * escala, sem materializar o W desquantizado
+        z = x @ W.T if scale is None else (x @ W.T) * scale
+        z = z + b
+        return np.maximum(0, z) if self.non_linear else z
+
+    def clear_gradient(self):
+        for param in self.parameters():
+            param.grad.fill(0)
+
     def parameters(self):
-        return [param for neuron in self.neurons for param in neuron.parameters()]
-    
+        return [self.W, self.b]
+
     def __repr__(self):
-        return f"Layer ({','.join(str(neuron) for neuron in self.neurons)})"
+        n_output, n_inputs = self.W.value.shape
+        return f"Layer ({'ReLU' if self.non_linear else 'Linear'} - {n_output} neurônios de {n_inputs} entradas)"
+
+
+'''
+    Geração de código do passo de treino (forward + backward) de um MLP
+    - Para uma arquitetura fixa o grafo computacional é sempre o mesmo, só os valores mudam
+    - Ao invés de reconstruir o grafo a cada passo, é gerado o código de uma função step sem laços
+      nem grafo, com as contas de cada camada escritas em sequência (ver MLP.trace)
+    - As funções geradas ficam em _STEP_CACHE, uma por arquitetura (ativações das camadas) e formato da entrada
+'''
+_STEP_CACHE = {}
+
+def _generate_step(non_linear, batched):
+    n_layers = len(non_linear)
+    params = ', '.join(f'W{i}, b{i}' for i in range(n_layers))
+    lines = [f'def step(x, loss_grad, {params}):']
+
+    # forward: a_{-1} = x
+    inputs = ['x'] + [f'a{i}' for i in range(n_layers - 1)]
+    for i in range(n_layers):
+        lines.append(f'    z{i} = {inputs[i]} @ W{i}.T + b{i}')
+        lines.append(f'    a{i} = np.maximum(0.0, z{i})' if non_linear[i] else f'    a{i} = z{i}')
+
+    lines.append(f'    loss, da{n_layers - 1} = loss_grad(a{n_layers - 1})')
+
+    # backward, da última camada para a primeira
+    for i in reversed(range(n_layers)):
+        lines.append(f'    dz{i} = da{i} * (z{i} > 0.0)' if non_linear[i] else f'    dz{i} = da{i}')
+        if batched:
+            lines.append(f'    dW{i} = dz{i}.T @ {inputs[i]}')
+            lines.append(f'    db{i} = dz{i}.sum(axis=0)')
+        else:
+            lines.append(f'    dW{i} = np.outer(dz{i}, {inputs[i]})')
+            lines.append(f'    db{i} = dz{i}')
+        if i > 0:
+            lines.append(f'    da{i - 1} = dz{i} @ W{i}')
+
+    grads = ', '.join(f'dW{i}, db{i}' for i in range(n_layers))
+    lines.append(f'    return loss, ({grads}, )')
+
+    return '\n'.join(lines) + '\n'
 
 
 '''
@@ -63,18 +227,90 @@ class Layer(Module):
 '''
 class MLP(Module):
     # n_outputs corresponde a todas as camadas intermediárias e a camada final
-    def __init__(self, n_inputs, n_outputs): 
+    # device='cuda' coloca todos os parâmetros na GPU (requer o CuPy; experimental, ver array_module)
+    def __init__(self, n_inputs, n_outputs, device='cpu'): 
         net_dim = [n_inputs] + n_outputs
-        self.layers = [Layer(net_dim[i], net_dim[i+1], non_linear = i != len(n_outputs) - 1) for i in range(len(n_outputs))]
+        self.device = device
+        self._xp = array_module(device)
+        self.layers = [Layer(net_dim[i], net_dim[i+1], non_linear = i != len(n_outputs) - 1, device=device) for i in range(len(n_outputs))]
+        self._parameters = [param for layer in self.layers for param in layer.parameters()]
+
+        # Todos os parâmetros em dois buffers contíguos: o value/grad de cada parâmetro passa a ser uma view
+        # Assim zerar os gradientes (ou um passo de SGD) é uma única operação sobre o buffer inteiro
+        # Os parâmetros devem ser atualizados in-place (param.value -= ...) para manter as views
+        n_parameters = sum(param.value.size for param in self._parameters)
+        self.parameter_values = self._xp.empty(n_parameters)
+        self.parameter_gradients = self._xp.zeros(n_parameters)
+
+        offset = 0
+        for param in self._parameters:
+            size, shape = param.value.size, param.value.shape
+            self.parameter_values[offset:offset + size] = param.value.ravel()
+            param.value = self.parameter_values[offset:offset + size].reshape(shape)
+            param.grad = self.parameter_gradients[offset:offset + size].reshape(shape)
+            offset += size
     
+    # Recebe uma lista de Nodes/valores e devolve os Nodes escalares da saída
     def __call__(self, x):
         for layer in self.layers:
             x = layer(x)
         
+        res = x.to_device('cpu').to_nodes()
+        return res[0] if len(res) == 1 else res
+
+    # Forward de um mini-batch X (batch, n_inputs), ao invés de chamar o MLP amostra por amostra
+    # Retorna o TensorNode (batch, n_output) da saída; to_nodes() devolve os Nodes de cada amostra
+    def forward_batch(self, X):
+        for layer in self.layers:
+            X = layer.forward_batch(X)
+
+        return X
+
+    # Pesos de inferência em dtype para todas as camadas (ver Layer.to)
+    def to(self, dtype):
+        for layer in self.layers:
+            layer.to(dtype)
+
+        return self
+
+    # Inferência sem grafo para x (n_inputs,) ou X (batch, n_inputs), retornando um ndarray
+    def predict(self, x):
+        for layer in self.layers:
+            x = layer.predict(x)
+
         return x
+
+    # Compila o passo de treino para entradas no formato de sample_x - (n_inputs,) ou (batch, n_inputs)
+    # Retorna train_step(x, loss_grad), onde loss_grad(saída) -> (loss, dloss/dsaída)
+    # train_step acumula os gradientes em param.grad (como o backward_propagation) e retorna a loss
+    def trace(self, sample_x):
+        # O código gerado depende apenas das ativações de cada camada e de a entrada ser um batch
+        key = (tuple(layer.non_linear for layer in self.layers), np.ndim(sample_x) == 2)
+
+        step = _STEP_CACHE.get(key)
+        if step is None:
+            source = _generate_step(*key)
+            namespace = {'np': np}
+            exec(compile(source, f'<MLP step {key}>', 'exec'), namespace)
+            step = _STEP_CACHE[key] = namespace['step']
+
+        params = self._parameters
+        xp = self._xp
+
+        def train_step(x, loss_grad):
+            loss, grads = step(xp.asarray(x), loss_grad, *(param.value for param in params))
+            for param, grad in zip(params, grads):
+                param.grad += grad
+
+            return loss
+
+        return train_step
+
+    def clear_gradient(self):
+        self.parameter_gradients.fill(0)
     
     def parameters(self):
-        return [param for layer in self.layers for param in layer.parameters()]
+        return self._parameters
 
     def __repr__(self):
         return f"MLP ({', '.join(str(layer) for layer in self.layers)})"
\ No newline at end of file